@@ -1,21 +1,27 @@
-import json
 import os
-import tempfile
+import threading
+import time
+from collections import deque
 from datetime import date, timedelta
 
-import boto3
+import orjson
 from flask import current_app
 from flask.views import MethodView
 from flask_smorest import Blueprint
-from werkzeug.utils import secure_filename
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from database import SessionLocal, engine
+from database import db_session, engine
 from detection import detect_basic_subscriptions
 from models import Base, Invoice, Subscription, Transaction, Vendor
 
 from api_schemas import (
+    BulkUpdateSubscriptionsRequestSchema,
+    BulkUpdateSubscriptionsResponseSchema,
     DemoResetResponseSchema,
     ErrorResponseSchema,
+    ListQuerySchema,
     OkResponseSchema,
     PingResponseSchema,
     PlaidExchangeRequestSchema,
@@ -34,6 +40,7 @@ from api_schemas import (
 )
 
 # Plaid
+from plaid import ApiException
 from plaid.model.country_code import CountryCode
 from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
 from plaid.model.link_token_create_request import LinkTokenCreateRequest
@@ -43,6 +50,48 @@ from plaid.model.transactions_get_request import TransactionsGetRequest
 from plaid.model.transactions_get_request_options import TransactionsGetRequestOptions
 
 
+# Client-side Plaid throttling: a sliding one-minute window plus backoff on HTTP 429.
+# The window is per process, so the PLAID_MAX_RPM budget is split across WEB_CONCURRENCY workers.
+PLAID_MAX_RPM = max(1, int(os.getenv("PLAID_MAX_RPM", 50)) // int(os.getenv("WEB_CONCURRENCY", 1)))
+PLAID_MAX_RETRIES = 3
+PLAID_BACKOFF_BASE = 0.25  # seconds, doubled on each retry
+PLAID_MAX_BACKOFF = 10.0
+PLAID_PAGE_SIZE = 500  # max count accepted by /transactions/get
+
+_plaid_calls: deque[float] = deque()
+_plaid_calls_lock = threading.Lock()
+
+_LINK_TOKEN_REQUEST = LinkTokenCreateRequest(
+    user={"client_user_id": "demo-user-123"},
+    client_name="SubTracker Demo",
+    products=[Products("transactions")],
+    country_codes=[CountryCode("US")],
+    language="en",
+)
+_SANDBOX_PUBLIC_TOKEN_REQUEST = SandboxPublicTokenCreateRequest(
+    institution_id="ins_109509",
+    initial_products=[Products("transactions")],
+)
+
+_UPDATABLE_SUBSCRIPTION_FIELDS = ("status", "interval", "next_expected")
+
+_PONG = b'{"ok":true,"msg":"pong"}'
+
+# Returned as-is by /api/textract when MOCK_TEXTRACT is on; treat as read-only.
+_MOCK_TEXTRACT_RESULT = {
+    "vendor": "Adobe Inc.",
+    "total": 29.99,
+    "invoice_date": "2025-07-01",
+    "billing_period": "monthly",
+    "raw": {"mock": True},
+}
+
+
+def _json_response(payload: dict, status: int = 200):
+    # read-heavy list endpoints skip the Marshmallow dump; their schemas stay for OpenAPI only
+    return current_app.response_class(orjson.dumps(payload), status=status, mimetype="application/json")
+
+
 def _error(code: str, message: str, status_code: int, details=None):
     payload = {"error": {"code": code, "message": message}}
     if details is not None:
@@ -50,8 +99,63 @@ def _error(code: str, message: str, status_code: int, details=None):
     return payload, status_code
 
 
-def _to_jsonable(obj):
-    return json.loads(json.dumps(obj, default=str))
+def _schema_outdated_error(session, exc: OperationalError):
+    # tables created before the unique indexes were added can't back ON CONFLICT upserts
+    session.rollback()
+    if "ON CONFLICT clause does not match" not in str(exc.orig):
+        raise exc
+    # a ready Response, so the route's 200 schema doesn't dump the error body away
+    return _json_response(
+        *_error(
+            "DB_SCHEMA_OUTDATED",
+            "Database schema is out of date; POST /api/demo/reset to recreate it",
+            500,
+        )
+    )
+
+
+def _wait_for_plaid_slot() -> None:
+    while True:
+        with _plaid_calls_lock:
+            now = time.monotonic()
+            while _plaid_calls and now - _plaid_calls[0] >= 60:
+                _plaid_calls.popleft()
+            if len(_plaid_calls) < PLAID_MAX_RPM:
+                _plaid_calls.append(now)
+                return
+            wait = 60 - (now - _plaid_calls[0])
+        time.sleep(wait)
+
+
+def _retry_after(exc: ApiException) -> float | None:
+    value = (exc.headers or {}).get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _plaid_call(fn, req):
+    """Call a Plaid API method, waiting out rate limits instead of failing the request."""
+    for attempt in range(PLAID_MAX_RETRIES + 1):
+        _wait_for_plaid_slot()
+        try:
+            return fn(req)
+        except ApiException as exc:
+            if exc.status != 429 or attempt == PLAID_MAX_RETRIES:
+                raise
+            delay = _retry_after(exc) or PLAID_BACKOFF_BASE * 2**attempt
+            time.sleep(min(delay, PLAID_MAX_BACKOFF))
+
+
+def _expense_summary_fields(resp: dict) -> dict:
+    # first match per lowercased type wins
+    summary = {}
+    for doc in resp.get("ExpenseDocuments", []):
+        for field in doc.get("SummaryFields", []):
+            key = field.get("Type", {}).get("Text", "").lower()
+            summary.setdefault(key, field.get("ValueDetection", {}).get("Text"))
+    return summary
 
 
 def _seed_demo_transactions(session) -> int:
@@ -62,22 +166,56 @@ def _seed_demo_transactions(session) -> int:
         ("Spotify", [base - timedelta(days=2), base - timedelta(days=32), base - timedelta(days=62)], 9.99),
         ("Starbucks", [base - timedelta(days=3), base - timedelta(days=11), base - timedelta(days=20)], 5.50),
     ]
-    inserted = 0
-    for name, dates, amt in demo:
-        for d in dates:
-            session.add(
-                Transaction(
-                    vendor_id=None,
-                    plaid_txn_id=None,
-                    merchant_name=name,
-                    amount=amt,
-                    iso_currency_code="USD",
-                    date=d.isoformat(),
-                    raw={"seed": True},
-                )
-            )
-            inserted += 1
-    return inserted
+    rows = [
+        {
+            "vendor_id": None,
+            "plaid_txn_id": None,
+            "merchant_name": name,
+            "amount": amt,
+            "iso_currency_code": "USD",
+            "date": d,
+            "raw": {"seed": True},
+        }
+        for name, dates, amt in demo
+        for d in dates
+    ]
+    session.execute(insert(Transaction), rows)
+    return len(rows)
+
+
+def _list_subscriptions(session, ids=None, limit=None, offset=0) -> list[dict]:
+    q = select(
+        Subscription.id,
+        Vendor.name.label("vendor"),
+        Subscription.interval,
+        Subscription.status,
+        Subscription.next_expected,
+        Subscription.confidence,
+    ).outerjoin(Vendor, Vendor.id == Subscription.vendor_id)
+    if ids is not None:
+        q = q.where(Subscription.id.in_(ids))
+    if limit is not None:
+        q = q.order_by(Subscription.id.desc()).limit(limit).offset(offset)
+    return [dict(row._mapping) for row in session.execute(q)]
+
+
+def _update_subscriptions(session, updates: list[dict]) -> set[int]:
+    """Apply PATCH updates as one executemany UPDATE; returns ids that don't exist (nothing is written then)."""
+    ids = {u["id"] for u in updates}
+    found = set(session.scalars(select(Subscription.id).where(Subscription.id.in_(ids))))
+    if ids - found:
+        return ids - found
+
+    # allowed values are enforced by UpdateSubscriptionRequestSchema (OneOf)
+    params = []
+    for u in updates:
+        values = {f: u[f] for f in _UPDATABLE_SUBSCRIPTION_FIELDS if u.get(f) is not None}
+        if values:
+            params.append({"id": u["id"], **values})
+
+    if params:
+        session.execute(update(Subscription), params)
+    return set()
 
 
 blp_core = Blueprint("core", __name__, url_prefix="/api", description="Core API")
@@ -100,9 +238,9 @@ blp_data = Blueprint("data", __name__, url_prefix="/api", description="Data view
 
 @blp_core.route("/ping")
 class PingResource(MethodView):
-    @blp_core.response(200, PingResponseSchema)
+    @blp_core.alt_response(200, schema=PingResponseSchema)
     def get(self):
-        return {"ok": True, "msg": "pong"}
+        return current_app.response_class(_PONG, mimetype="application/json")
 
 
 @blp_demo.route("/reset")
@@ -110,9 +248,9 @@ class DemoResetResource(MethodView):
     @blp_demo.doc(summary="1) Reset demo DB")
     @blp_demo.response(200, DemoResetResponseSchema)
     def post(self):
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
-        engine.dispose()
+        with engine.begin() as conn:
+            Base.metadata.drop_all(bind=conn)
+            Base.metadata.create_all(bind=conn)
         return {"ok": True, "reset": True}
 
 
@@ -121,13 +259,10 @@ class DemoSeedResource(MethodView):
     @blp_demo.doc(summary="2) Seed demo transactions")
     @blp_demo.response(200, SeedResponseSchema)
     def post(self):
-        s = SessionLocal()
-        try:
+        s = db_session()
+        with s.begin():
             inserted = _seed_demo_transactions(s)
-            s.commit()
-            return {"ok": True, "inserted": inserted}
-        finally:
-            s.close()
+        return {"ok": True, "inserted": inserted}
 
 
 @blp_plaid.route("/link_token")
@@ -140,14 +275,7 @@ class PlaidLinkTokenResource(MethodView):
             return _error("PLAID_NOT_CONFIGURED", "Plaid client is not configured", 500)
 
         try:
-            req = LinkTokenCreateRequest(
-                user={"client_user_id": "demo-user-123"},
-                client_name="SubTracker Demo",
-                products=[Products("transactions")],
-                country_codes=[CountryCode("US")],
-                language="en",
-            )
-            resp = plaid_client.link_token_create(req)
+            resp = _plaid_call(plaid_client.link_token_create, _LINK_TOKEN_REQUEST)
         except Exception as exc:
             return _error("PLAID_ERROR", "Plaid request failed", 502, {"detail": str(exc)})
 
@@ -173,7 +301,7 @@ class PlaidExchangeResource(MethodView):
 
         try:
             ex_req = ItemPublicTokenExchangeRequest(public_token=public_token)
-            ex_resp = plaid_client.item_public_token_exchange(ex_req)
+            ex_resp = _plaid_call(plaid_client.item_public_token_exchange, ex_req)
         except Exception as exc:
             return _error("PLAID_ERROR", "Plaid request failed", 502, {"detail": str(exc)})
 
@@ -191,11 +319,7 @@ class PlaidSandboxPublicTokenResource(MethodView):
             return _error("PLAID_NOT_CONFIGURED", "Plaid client is not configured", 500)
 
         try:
-            req = SandboxPublicTokenCreateRequest(
-                institution_id="ins_109509",
-                initial_products=[Products("transactions")],
-            )
-            resp = plaid_client.sandbox_public_token_create(req)
+            resp = _plaid_call(plaid_client.sandbox_public_token_create, _SANDBOX_PUBLIC_TOKEN_REQUEST)
         except Exception as exc:
             return _error("PLAID_ERROR", "Plaid request failed", 502, {"detail": str(exc)})
 
@@ -206,6 +330,7 @@ class PlaidSandboxPublicTokenResource(MethodView):
 class PlaidTransactionsResource(MethodView):
     @blp_plaid.response(200, PlaidTransactionsResponseSchema)
     @blp_plaid.alt_response(400, schema=ErrorResponseSchema)
+    @blp_plaid.alt_response(500, schema=ErrorResponseSchema)
     @blp_plaid.alt_response(502, schema=ErrorResponseSchema)
     def get(self):
         access_token = current_app.config.get("PLAID_ACCESS_TOKEN")
@@ -223,49 +348,51 @@ class PlaidTransactionsResource(MethodView):
         start_date = date.today() - timedelta(days=120)
         end_date = date.today()
 
-        request_options = TransactionsGetRequestOptions(count=50)
-        t_req = TransactionsGetRequest(
-            access_token=access_token,
-            start_date=start_date,
-            end_date=end_date,
-            options=request_options,
-        )
-
+        # page through the whole window at Plaid's max page size
+        txns = []
         try:
-            t_resp = plaid_client.transactions_get(t_req).to_dict()
+            while True:
+                t_req = TransactionsGetRequest(
+                    access_token=access_token,
+                    start_date=start_date,
+                    end_date=end_date,
+                    options=TransactionsGetRequestOptions(count=PLAID_PAGE_SIZE, offset=len(txns)),
+                )
+                t_resp = _plaid_call(plaid_client.transactions_get, t_req).to_dict()
+                page = t_resp.get("transactions", [])
+                txns.extend(page)
+                if not page or len(txns) >= t_resp.get("total_transactions", 0):
+                    break
         except Exception as exc:
             return _error("PLAID_ERROR", "Plaid request failed", 502, {"detail": str(exc)})
 
-        txns = t_resp.get("transactions", [])
-
-        s = SessionLocal()
+        s = db_session()
+        rows = []
+        for t in txns:
+            t_date = t.get("date")
+            if isinstance(t_date, str):
+                t_date = date.fromisoformat(t_date)
+
+            rows.append(
+                {
+                    "vendor_id": None,
+                    "plaid_txn_id": t.get("transaction_id"),
+                    "merchant_name": t.get("merchant_name") or t.get("name"),
+                    "amount": t.get("amount"),
+                    "iso_currency_code": t.get("iso_currency_code"),
+                    "date": t_date,
+                    "raw": t,
+                }
+            )
         saved = 0
-        try:
-            for t in txns:
-                if s.query(Transaction).filter_by(plaid_txn_id=t.get("transaction_id")).first():
-                    continue
-
-                t_date = t.get("date")
-                date_str = (
-                    t_date.isoformat()
-                    if hasattr(t_date, "isoformat")
-                    else (str(t_date) if t_date is not None else None)
-                )
-
-                merchant = t.get("merchant_name") or t.get("name")
-                obj = Transaction(
-                    plaid_txn_id=t.get("transaction_id"),
-                    merchant_name=merchant,
-                    amount=t.get("amount"),
-                    iso_currency_code=t.get("iso_currency_code"),
-                    date=date_str,
-                    raw=_to_jsonable(t),
-                )
-                s.add(obj)
-                saved += 1
-            s.commit()
-        finally:
-            s.close()
+        if rows:
+            # rowcount on the raw connection counts only rows not skipped by ON CONFLICT
+            stmt = sqlite_insert(Transaction).on_conflict_do_nothing(index_elements=[Transaction.plaid_txn_id])
+            try:
+                saved = s.connection().execute(stmt, rows).rowcount
+            except OperationalError as exc:
+                return _schema_outdated_error(s, exc)
+        s.commit()
 
         return {"saved": saved}
 
@@ -273,41 +400,26 @@ class PlaidTransactionsResource(MethodView):
 @blp_core.route("/detect")
 class DetectResource(MethodView):
     @blp_core.doc(summary="3) Detect subscriptions")
+    @blp_core.arguments(ListQuerySchema, location="query")
     @blp_core.response(200, SubscriptionsResponseSchema)
-    def post(self):
-        s = SessionLocal()
+    @blp_core.alt_response(500, schema=ErrorResponseSchema)
+    def post(self, args):
+        s = db_session()
         try:
             detect_basic_subscriptions(s)
-            subs = s.query(Subscription).all()
-            out = []
-            for sub in subs:
-                vendor = s.get(Vendor, sub.vendor_id) if sub.vendor_id else None
-                out.append(
-                    {
-                        "id": sub.id,
-                        "vendor": vendor.name if vendor else None,
-                        "interval": sub.interval,
-                        "status": sub.status,
-                        "next_expected": sub.next_expected,
-                        "confidence": getattr(sub, "confidence", None),
-                    }
-                )
-            return {"subscriptions": out}
-        finally:
-            s.close()
+        except OperationalError as exc:
+            return _schema_outdated_error(s, exc)
+        return {"subscriptions": _list_subscriptions(s, limit=args["limit"], offset=args["offset"])}
 
 
 @blp_core.route("/seed")
 class SeedResource(MethodView):
     @blp_core.response(200, SeedResponseSchema)
     def post(self):
-        s = SessionLocal()
-        try:
+        s = db_session()
+        with s.begin():
             inserted = _seed_demo_transactions(s)
-            s.commit()
-            return {"ok": True, "inserted": inserted}
-        finally:
-            s.close()
+        return {"ok": True, "inserted": inserted}
 
 
 @blp_core.route("/textract")
@@ -323,72 +435,43 @@ class TextractResource(MethodView):
         if not file:
             return _error("BAD_REQUEST", "file required", 400)
 
-        filename = secure_filename(getattr(file, "filename", None) or "invoice.pdf")
-        suffix = os.path.splitext(filename)[1]
-        temp_path = None
+        if current_app.config.get("MOCK_TEXTRACT", True):
+            result = _MOCK_TEXTRACT_RESULT
+        else:
+            client = current_app.extensions["textract_client"]
+            data = file.read()
+            resp = client.analyze_expense(Document={"Bytes": data})
+
+            summary = _expense_summary_fields(resp)
+
+            total = summary.get("total")
+            invoice_date = summary.get("invoice_receipt_date") or summary.get("invoice_date")
+            vendor = summary.get("vendor_name")
+
+            result = {
+                "vendor": vendor or "Unknown Vendor",
+                "total": float(total) if total else None,
+                "invoice_date": invoice_date,
+                "billing_period": "unknown",
+                "raw": resp,
+            }
 
-        try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                temp_path = tmp.name
-            file.save(temp_path)
-
-            if os.getenv("MOCK_TEXTRACT", "0") == "1" or not os.getenv("AWS_ACCESS_KEY_ID"):
-                result = {
-                    "vendor": "Adobe Inc.",
-                    "total": 29.99,
-                    "invoice_date": "2025-07-01",
-                    "billing_period": "monthly",
-                    "raw": {"mock": True},
-                }
-            else:
-                client = boto3.client("textract", region_name=os.getenv("AWS_REGION", "us-east-1"))
-                with open(temp_path, "rb") as f:
-                    data = f.read()
-                resp = client.analyze_expense(Document={"Bytes": data})
-
-                def find_field(blocks, name):
-                    for doc in resp.get("ExpenseDocuments", []):
-                        for field in doc.get("SummaryFields", []):
-                            if field.get("Type", {}).get("Text", "").lower() == name:
-                                return field.get("ValueDetection", {}).get("Text")
-                    return None
-
-                total = find_field(resp, "total")
-                invoice_date = find_field(resp, "invoice_receipt_date") or find_field(resp, "invoice_date")
-                vendor = find_field(resp, "vendor_name")
-
-                result = {
-                    "vendor": vendor or "Unknown Vendor",
-                    "total": float(total) if total else None,
-                    "invoice_date": invoice_date,
-                    "billing_period": "unknown",
-                    "raw": resp,
-                }
-        finally:
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except OSError:
-                    pass
-
-        s = SessionLocal()
-        try:
-            v = s.query(Vendor).filter(Vendor.name == result["vendor"]).one_or_none()
-            if not v:
-                v = Vendor(name=result["vendor"])
-                s.add(v)
-                s.flush()
-            inv = Invoice(
-                vendor_id=v.id,
-                total=result.get("total"),
-                invoice_date=result.get("invoice_date"),
-                billing_period=result.get("billing_period"),
-                raw=result.get("raw"),
-            )
-            s.add(inv)
-            s.commit()
-        finally:
-            s.close()
+        s = db_session()
+        vendor_id = s.execute(
+            sqlite_insert(Vendor)
+            .values(name=result["vendor"])
+            .on_conflict_do_update(index_elements=[Vendor.name], set_={"name": result["vendor"]})
+            .returning(Vendor.id)
+        ).scalar_one()
+        inv = Invoice(
+            vendor_id=vendor_id,
+            total=result.get("total"),
+            invoice_date=result.get("invoice_date"),
+            billing_period=result.get("billing_period"),
+            raw=result.get("raw"),
+        )
+        s.add(inv)
+        s.commit()
 
         return {"ok": True, "parsed": result}
 
@@ -396,82 +479,88 @@ class TextractResource(MethodView):
 @blp_data.route("/vendors")
 class VendorsResource(MethodView):
     @blp_data.doc(summary="4) View vendors")
-    @blp_data.response(200, VendorsResponseSchema)
-    def get(self):
-        s = SessionLocal()
-        try:
-            vs = s.query(Vendor).all()
-            return {"vendors": [{"id": v.id, "name": v.name} for v in vs]}
-        finally:
-            s.close()
+    @blp_data.arguments(ListQuerySchema, location="query")
+    @blp_data.alt_response(200, schema=VendorsResponseSchema)
+    def get(self, args):
+        s = db_session()
+        vs = s.execute(
+            select(Vendor.id, Vendor.name)
+            .order_by(Vendor.id.desc())
+            .limit(args["limit"])
+            .offset(args["offset"])
+        ).all()
+        return _json_response({"vendors": [{"id": v.id, "name": v.name} for v in vs]})
 
 
 @blp_data.route("/transactions")
 class TransactionsResource(MethodView):
     @blp_data.doc(summary="4) View transactions")
     @blp_data.arguments(TransactionsQuerySchema, location="query")
-    @blp_data.response(200, TransactionsResponseSchema)
+    @blp_data.alt_response(200, schema=TransactionsResponseSchema)
     def get(self, args):
         vendor_id = args.get("vendor_id")
         limit = args.get("limit", 200)
-
-        s = SessionLocal()
-        try:
-            q = s.query(Transaction)
-            if vendor_id is not None:
-                q = q.filter(Transaction.vendor_id == vendor_id)
-
-            items = q.order_by(Transaction.id.desc()).limit(limit).all()
-
-            vendor_ids = {t.vendor_id for t in items if t.vendor_id is not None}
-            vendor_map = {}
-            if vendor_ids:
-                rows = s.query(Vendor).filter(Vendor.id.in_(vendor_ids)).all()
-                vendor_map = {v.id: v.name for v in rows}
-
-            return {
-                "transactions": [
-                    {
-                        "id": t.id,
-                        "vendor_id": t.vendor_id,
-                        "vendor_name": vendor_map.get(t.vendor_id),
-                        "plaid_txn_id": t.plaid_txn_id,
-                        "merchant_name": t.merchant_name,
-                        "amount": t.amount,
-                        "currency": t.iso_currency_code,
-                        "date": t.date,
-                    }
-                    for t in items
-                ]
+        after_id = args.get("after_id")
+
+        s = db_session()
+        q = select(
+            Transaction.id,
+            Transaction.vendor_id,
+            Vendor.name.label("vendor_name"),
+            Transaction.plaid_txn_id,
+            Transaction.merchant_name,
+            Transaction.amount,
+            Transaction.iso_currency_code,
+            Transaction.date,
+        ).outerjoin(Vendor, Vendor.id == Transaction.vendor_id)
+        if vendor_id is not None:
+            q = q.where(Transaction.vendor_id == vendor_id)
+        # keyset pagination on id
+        if after_id is not None:
+            q = q.where(Transaction.id < after_id)
+
+        items = s.execute(q.order_by(Transaction.id.desc()).limit(limit)).all()
+
+        transactions = [
+            {
+                "id": t.id,
+                "vendor_id": t.vendor_id,
+                "vendor_name": t.vendor_name,
+                "plaid_txn_id": t.plaid_txn_id,
+                "merchant_name": t.merchant_name,
+                "amount": t.amount,
+                "currency": t.iso_currency_code,
+                "date": t.date,  # orjson renders date as "YYYY-MM-DD"
             }
-        finally:
-            s.close()
+            for t in items
+        ]
+        next_cursor = items[-1].id if len(items) == limit else None
+        return _json_response({"transactions": transactions, "next_cursor": next_cursor})
 
 
 @blp_data.route("/subscriptions")
 class SubscriptionsResource(MethodView):
     @blp_data.doc(summary="4) View subscriptions")
-    @blp_data.response(200, SubscriptionsResponseSchema)
-    def get(self):
-        s = SessionLocal()
-        try:
-            subs = s.query(Subscription).all()
-            out = []
-            for sub in subs:
-                vendor = s.get(Vendor, sub.vendor_id) if sub.vendor_id else None
-                out.append(
-                    {
-                        "id": sub.id,
-                        "vendor": vendor.name if vendor else None,
-                        "interval": sub.interval,
-                        "status": sub.status,
-                        "next_expected": sub.next_expected,
-                        "confidence": getattr(sub, "confidence", None),
-                    }
-                )
-            return {"subscriptions": out}
-        finally:
-            s.close()
+    @blp_data.arguments(ListQuerySchema, location="query")
+    @blp_data.alt_response(200, schema=SubscriptionsResponseSchema)
+    def get(self, args):
+        s = db_session()
+        subs = _list_subscriptions(s, limit=args["limit"], offset=args["offset"])
+        return _json_response({"subscriptions": subs})
+
+    @blp_data.doc(summary="Update several subscriptions in one transaction")
+    @blp_data.arguments(BulkUpdateSubscriptionsRequestSchema)
+    @blp_data.response(200, BulkUpdateSubscriptionsResponseSchema)
+    @blp_data.alt_response(404, schema=ErrorResponseSchema)
+    def patch(self, args):
+        updates = args["updates"]
+        s = db_session()
+        missing = _update_subscriptions(s, updates)
+        if missing:
+            return _error("NOT_FOUND", "not found", 404, {"ids": sorted(missing)})
+        s.commit()
+        ids = [u["id"] for u in updates]
+        return {"ok": True, "subscriptions": _list_subscriptions(s, ids)}
 
 
 @blp_data.route("/subscriptions/<int:sub_id>")
@@ -480,39 +569,11 @@ class SubscriptionUpdateResource(MethodView):
     @blp_data.response(200, UpdateSubscriptionResponseSchema)
     @blp_data.alt_response(404, schema=ErrorResponseSchema)
     def patch(self, args, sub_id: int):
-        s = SessionLocal()
-        try:
-            sub = s.get(Subscription, sub_id)
-            if not sub:
-                return _error("NOT_FOUND", "not found", 404)
-
-            status = args.get("status")
-            interval = args.get("interval")
-            next_expected = args.get("next_expected")
-
-            if status in {"active", "cancelled", "inferred"}:
-                sub.status = status
-            if interval in {"monthly", "yearly", "unknown"}:
-                sub.interval = interval
-            if isinstance(next_expected, str):
-                sub.next_expected = next_expected
-
-            s.commit()
-
-            vendor = s.get(Vendor, sub.vendor_id) if sub.vendor_id else None
-            return {
-                "ok": True,
-                "subscription": {
-                    "id": sub.id,
-                    "vendor": vendor.name if vendor else None,
-                    "status": sub.status,
-                    "interval": sub.interval,
-                    "next_expected": sub.next_expected,
-                    "confidence": getattr(sub, "confidence", None),
-                },
-            }
-        finally:
-            s.close()
+        s = db_session()
+        if _update_subscriptions(s, [{**args, "id": sub_id}]):
+            return _error("NOT_FOUND", "not found", 404)
+        s.commit()
+        return {"ok": True, "subscription": _list_subscriptions(s, [sub_id])[0]}
 
 
 def register_api(api) -> None:
@@ -85,12 +85,20 @@ class TransactionSchema(Schema):
 # GET /api/transactions (response)
 class TransactionsResponseSchema(Schema):
     transactions = fields.List(fields.Nested(TransactionSchema), required=True)
+    next_cursor = fields.Integer(allow_none=True, metadata={"description": "Pass as after_id for the next page"})
 
 
 # GET /api/transactions (query params)
 class TransactionsQuerySchema(Schema):
     vendor_id = fields.Integer(allow_none=True)
     limit = fields.Integer(load_default=200, validate=validate.Range(min=1, max=1000))
+    after_id = fields.Integer(allow_none=True, metadata={"description": "Return transactions older than this id"})
+
+
+# GET /api/subscriptions, GET /api/vendors and POST /api/detect (query params)
+class ListQuerySchema(Schema):
+    limit = fields.Integer(load_default=200, validate=validate.Range(min=1, max=1000))
+    offset = fields.Integer(load_default=0, validate=validate.Range(min=0))
 
 
 # Used inside GET /api/subscriptions and POST /api/detect (response)
@@ -129,6 +137,26 @@ class UpdateSubscriptionResponseSchema(Schema):
     subscription = fields.Nested(SubscriptionSchema, required=True)
 
 
+# Used inside PATCH /api/subscriptions (request body)
+class SubscriptionUpdateItemSchema(UpdateSubscriptionRequestSchema):
+    id = fields.Integer(required=True)
+
+
+# PATCH /api/subscriptions (request body)
+class BulkUpdateSubscriptionsRequestSchema(Schema):
+    updates = fields.List(
+        fields.Nested(SubscriptionUpdateItemSchema),
+        required=True,
+        validate=validate.Length(min=1),
+    )
+
+
+# PATCH /api/subscriptions (response)
+class BulkUpdateSubscriptionsResponseSchema(Schema):
+    ok = fields.Boolean(required=True)
+    subscriptions = fields.List(fields.Nested(SubscriptionSchema), required=True)
+
+
 # POST /api/textract (multipart/form-data request)
 class TextractUploadSchema(Schema):
     file = fields.Raw(
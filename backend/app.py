@@ -1,7 +1,11 @@
 import os
 
+import boto3
+import orjson
 from dotenv import load_dotenv
 from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 from flask_smorest import Api
 from plaid import ApiClient, Configuration, Environment
@@ -9,7 +13,7 @@ from plaid.api import plaid_api
 from werkzeug.exceptions import HTTPException
 
 from api_routes import register_api
-from database import engine
+from database import db_session, engine
 from models import Base
 
 load_dotenv()
@@ -34,6 +38,23 @@ def _create_plaid_client():
     return plaid_api.PlaidApi(api_client)
 
 
+def _create_textract_client():
+    return boto3.client("textract", region_name=os.getenv("AWS_REGION", "us-east-1"))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and flask-smorest responses)."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=str, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def _error_payload(code: str, message: str, details=None) -> dict:
     payload = {"error": {"code": code, "message": message}}
     if details is not None:
@@ -43,7 +64,11 @@ def _error_payload(code: str, message: str, details=None) -> dict:
 
 def create_app():
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev")
+    app.config["MOCK_TEXTRACT"] = (
+        os.getenv("MOCK_TEXTRACT", "0") == "1" or not os.getenv("AWS_ACCESS_KEY_ID")
+    )
     CORS(app)
 
     app.config.update(
@@ -63,12 +88,20 @@ def create_app():
         OPENAPI_SWAGGER_UI_URL="https://cdn.jsdelivr.net/npm/swagger-ui-dist/",
         OPENAPI_REDOC_PATH="/redoc",
         OPENAPI_REDOC_URL="https://cdn.jsdelivr.net/npm/redoc@next/bundles/redoc.standalone.js",
+        COMPRESS_MIMETYPES=["application/json"],
+        COMPRESS_MIN_SIZE=500,
+        COMPRESS_ALGORITHM=["br", "gzip"],
     )
+    Compress(app)
 
     Base.metadata.create_all(bind=engine)
 
     api = Api(app)
 
+    @app.teardown_appcontext
+    def remove_db_session(exc=None):
+        db_session.remove()
+
     @app.errorhandler(HTTPException)
     def handle_http_exception(exc: HTTPException):
         code = (exc.name or "HTTP_ERROR").upper().replace(" ", "_")
@@ -88,6 +121,7 @@ def create_app():
         return jsonify(_error_payload("INTERNAL_SERVER_ERROR", "Unexpected error", details)), 500
 
     app.extensions["plaid_client"] = _create_plaid_client()
+    app.extensions["textract_client"] = None if app.config["MOCK_TEXTRACT"] else _create_textract_client()
 
     register_api(api)
     return app
@@ -96,4 +130,7 @@ def create_app():
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
+    from waitress import serve
+
+    # keep DB_POOL_SIZE >= WSGI_THREADS so each thread can hold a connection
+    serve(app, host="0.0.0.0", port=int(os.getenv("PORT", 5000)), threads=int(os.getenv("WSGI_THREADS", 16)))
@@ -1,11 +1,52 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from decimal import Decimal
+import orjson
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./demo.db")
 
-# check_same_thread=False 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
\ No newline at end of file
+# in-memory SQLite lives inside a single connection, so leave its default pool alone
+_pool_kwargs = {} if ":memory:" in DATABASE_URL else {
+    "poolclass": QueuePool,
+    "pool_size": int(os.getenv("DB_POOL_SIZE", 20)),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    "pool_recycle": 300,
+}
+
+
+def _json_default(obj):
+    # orjson already handles date/datetime natively; Plaid amounts may arrive as Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return str(obj)
+
+
+# check_same_thread=False
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
+    pool_pre_ping=True,
+    json_serializer=lambda obj: orjson.dumps(obj, default=_json_default).decode(),
+    json_deserializer=orjson.loads,
+    **_pool_kwargs,
+)
+
+if "sqlite" in DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _record):
+        # WAL lets readers proceed during writes; NORMAL skips the fsync on every commit
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.execute("PRAGMA mmap_size=268435456")
+        cur.close()
+
+# expire_on_commit=False: handlers read attributes after commit without a refresh SELECT
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+# one session per thread for the lifetime of a request; app.py removes it on teardown
+db_session = scoped_session(SessionLocal)
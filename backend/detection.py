@@ -1,9 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import select, func, or_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models import Transaction, Vendor, Subscription
 from datetime import datetime, timedelta
-import re
-from collections import defaultdict
+from itertools import groupby
 
 # Name-based noise (substring match, lowercase) -- this is just an example list
 NAME_BLACKLIST = {
@@ -18,21 +18,15 @@ PFC_PRIMARY_EXCLUDE = {
     "INCOME", "TRANSFER_IN", "TRANSFER_OUT", "LOAN_PAYMENTS", "BANK_FEES", "SAVINGS"
 }
 
-WINDOW_DAYS = 150
-
-def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip().lower())
+# SQL noise filters: blacklisted names and excluded Plaid categories
+_MERCHANT_KEY = func.lower(func.trim(Transaction.merchant_name))
+_NOT_BLACKLISTED = ~or_(*(_MERCHANT_KEY.like(f"%{b}%") for b in sorted(NAME_BLACKLIST)))
+_PFC_NOT_EXCLUDED = func.upper(
+    func.coalesce(func.json_extract(Transaction.raw, "$.personal_finance_category.primary"), "")
+).notin_(sorted(PFC_PRIMARY_EXCLUDE))
 
-def _is_noise(tx: Transaction) -> bool:
-    n = _norm(tx.merchant_name or (tx.raw or {}).get("name", ""))
-    if any(b in n for b in NAME_BLACKLIST):
-        return True
-    raw = tx.raw or {}
-    pfc = (raw.get("personal_finance_category") or {})
-    primary = (pfc.get("primary") or "").upper()
-    if primary in PFC_PRIMARY_EXCLUDE:
-        return True
-    return False
+WINDOW_DAYS = 150
+MIN_OCCURRENCES = 3  # charges per merchant inside the window before we look for a cadence
 
 def _amounts_consistent(amts: list[float]) -> bool:
     """Return True if amounts are reasonably consistent (±25% tolerance or ≤ $5 absolute)."""
@@ -43,99 +37,123 @@ def _amounts_consistent(amts: list[float]) -> bool:
     mid = amts[len(amts)//2]
     if mid == 0:
         return True
-    spread = max(abs(a - mid) for a in amts)
+    # amts is sorted, so the furthest point from mid is one of the two ends
+    spread = max(mid - amts[0], amts[-1] - mid)
     return (spread <= 5.0) or (spread / abs(mid) <= 0.25)
 
+def _analyze_group(norm_merchant: str, items: list):
+    """Return (display name, rows, last charge date) for a monthly merchant, or None. Pure, no DB access."""
+    # amounts must be fairly consistent (reduces KFC/Starbucks etc.)
+    if not _amounts_consistent([it.amount for it in items]):
+        return None
+
+    # merchant_name is never NULL here and rows are date-ordered (both from the SQL query)
+    return items[0].merchant_name or norm_merchant, items, items[-1].date
+
 def detect_basic_subscriptions(db: Session):
     since = (datetime.utcnow() - timedelta(days=WINDOW_DAYS)).date()
 
-    txns = db.execute(
-        select(Transaction).where(Transaction.merchant_name.isnot(None))
-    ).scalars().all()
-    if not txns:
+    # let SQLite count per merchant and only load rows for merchants that can qualify
+    in_window = (
+        Transaction.merchant_name.isnot(None),
+        Transaction.date >= since,
+        _NOT_BLACKLISTED,
+        _PFC_NOT_EXCLUDED,
+    )
+    # mean gap between consecutive charges = (last - first) / (n - 1)
+    avg_gap = (func.julianday(func.max(Transaction.date)) - func.julianday(func.min(Transaction.date))) / (
+        func.count() - 1
+    )
+    candidates = (
+        select(_MERCHANT_KEY)
+        .where(*in_window)
+        .group_by(_MERCHANT_KEY)
+        # monthly ~ 30±3
+        .having(func.count() >= MIN_OCCURRENCES, avg_gap.between(27, 33))
+    )
+    rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.vendor_id,
+            Transaction.merchant_name,
+            Transaction.amount,
+            Transaction.date,
+            _MERCHANT_KEY.label("merchant_key"),
+        )
+        .where(*in_window, _MERCHANT_KEY.in_(candidates))
+        .order_by(_MERCHANT_KEY, Transaction.date)
+    ).all()
+    if not rows:
         return
 
-    groups: dict[str, list[Transaction]] = defaultdict(list)
-    for t in txns:
-        # date window filter and noise filter
-        try:
-            if not t.date or datetime.strptime(t.date, "%Y-%m-%d").date() < since:
-                continue
-        except Exception:
-            continue
-        if _is_noise(t):
-            continue
-        groups[_norm(t.merchant_name)].append(t)
-
-    for norm_merchant, items in groups.items():
-        if len(items) < 3:
-            continue
-
-        # use a display name from original data
-        merchant_display = next((it.merchant_name for it in items if it.merchant_name), norm_merchant)
-
-        # sort by date
-        items.sort(key=lambda x: x.date or "")
-        dates = []
-        for it in items:
-            try:
-                dates.append(datetime.strptime(it.date, "%Y-%m-%d"))
-            except Exception:
-                pass
-        if len(dates) < 3:
-            continue
-
-        # amounts must be fairly consistent (reduces KFC/Starbucks etc.)
-        if not _amounts_consistent([it.amount for it in items]):
-            continue
-
-        diffs = [(dates[i] - dates[i-1]).days for i in range(1, len(dates))]
-        if not diffs:
-            continue
-        avg = sum(diffs) / len(diffs)
+    # date window, noise, minimum count and monthly cadence are all applied in SQL
+    detected = []  # (display name, rows, last charge date) per monthly merchant
+    for norm_merchant, grp in groupby(rows, key=lambda r: r.merchant_key):
+        result = _analyze_group(norm_merchant, list(grp))
+        if result:
+            detected.append(result)
 
-        # monthly ~ 30±3
-        if 27 <= avg <= 33:
-            # upsert vendor (case-insensitive)
-            vendor = (
-                db.query(Vendor)
-                  .filter(func.lower(Vendor.name) == merchant_display.lower())
-                  .one_or_none()
-            )
-            if not vendor:
-                vendor = Vendor(name=merchant_display)
-                db.add(vendor)
-                db.flush()
-
-            # link transactions to this vendor
-            for it in items:
-                if it.vendor_id != vendor.id:
-                    it.vendor_id = vendor.id
-
-            # compute next_expected
-            last_dt = max(dates)
-            next_expected = (last_dt + timedelta(days=30)).date().isoformat()
-
-            # upsert subscription
-            sub = (
-                db.query(Subscription)
-                  .filter(Subscription.vendor_id == vendor.id)
-                  .one_or_none()
+    if not detected:
+        return
+
+    # vendors match case-insensitively
+    vendor_ids = {
+        name.lower(): vid
+        for vid, name in db.execute(
+            select(Vendor.id, Vendor.name).where(
+                func.lower(Vendor.name).in_({display.lower() for display, _, _ in detected})
             )
-            if not sub:
-                sub = Subscription(
-                    vendor_id=vendor.id,
-                    status="inferred",
-                    interval="monthly",
-                    confidence=0.7,
-                    next_expected=next_expected,
-                )
-                db.add(sub)
-            else:
-                sub.interval = "monthly"
-                sub.confidence = max(sub.confidence, 0.7)
-                sub.next_expected = next_expected
-
-            sub.last_seen = datetime.utcnow()
+        )
+    }
+
+    # ON CONFLICT covers a concurrent insert of the same name
+    # ordered like detected (merchant key order) so new vendor ids are stable across runs
+    missing = list(dict.fromkeys(display for display, _, _ in detected if display.lower() not in vendor_ids))
+    if missing:
+        db.execute(
+            sqlite_insert(Vendor).on_conflict_do_nothing(index_elements=[Vendor.name]),
+            [{"name": name} for name in missing],
+        )
+        vendor_ids.update(
+            (name.lower(), vid)
+            for vid, name in db.execute(select(Vendor.id, Vendor.name).where(Vendor.name.in_(missing)))
+        )
+
+    now = datetime.utcnow()
+    sub_rows, link_rows = [], []
+    for merchant_display, items, last_dt in detected:
+        vendor_id = vendor_ids[merchant_display.lower()]
+
+        # link transactions to this vendor
+        link_rows.extend({"id": it.id, "vendor_id": vendor_id} for it in items if it.vendor_id != vendor_id)
+
+        sub_rows.append(
+            {
+                "vendor_id": vendor_id,
+                "status": "inferred",
+                "interval": "monthly",
+                "confidence": 0.7,
+                "next_expected": (last_dt + timedelta(days=30)).isoformat(),
+                "first_seen": now,
+                "last_seen": now,
+            }
+        )
+
+    # status is left alone so user edits survive re-detection
+    stmt = sqlite_insert(Subscription)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Subscription.vendor_id],
+            set_={
+                "interval": stmt.excluded.interval,
+                "confidence": func.max(Subscription.confidence, stmt.excluded.confidence),
+                "next_expected": stmt.excluded.next_expected,
+                "last_seen": stmt.excluded.last_seen,
+            },
+        ),
+        sub_rows,
+    )
+    if link_rows:
+        db.execute(update(Transaction), link_rows)
 
     db.commit()
@@ -0,0 +1,22 @@
+# gunicorn settings for the Docker image (picked up automatically from the working dir)
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# gthread workers: Plaid/Textract calls are I/O-bound, so threads overlap the waits
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# workers inherit this, so api_routes can split the Plaid rate limit between them
+os.environ["WEB_CONCURRENCY"] = str(workers)
+threads = int(os.getenv("WSGI_THREADS", 4))
+# no preload: each worker builds its own app and DB connection pool after fork
+preload_app = False
+
+
+def on_starting(server):
+    # create tables once in the master so workers booting in parallel don't race on DDL
+    from database import engine
+    from models import Base
+
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
-from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, JSON, Text, Boolean
-from datetime import datetime
+from sqlalchemy import func, String, Integer, Float, Date, DateTime, ForeignKey, JSON, Text, Boolean, Index
+import datetime as dt
 
 Base = declarative_base()
 
@@ -14,19 +14,27 @@ class Vendor(Base):
     invoices = relationship("Invoice", back_populates="vendor")
     subscriptions = relationship("Subscription", back_populates="vendor")
 
+# case-insensitive vendor lookups (detection); not unique, names may differ only by case
+Index("ix_vendor_name_lower", func.lower(Vendor.name))
+
 class Transaction(Base):
     __tablename__ = "transactions"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     vendor_id: Mapped[int | None] = mapped_column(ForeignKey("vendors.id"))
-    plaid_txn_id: Mapped[str | None] = mapped_column(String(255), index=True)
+    plaid_txn_id: Mapped[str | None] = mapped_column(String(255), unique=True, index=True)
     merchant_name: Mapped[str | None] = mapped_column(String(255))
     amount: Mapped[float | None] = mapped_column(Float)
     iso_currency_code: Mapped[str | None] = mapped_column(String(10))
-    date: Mapped[str | None] = mapped_column(String(20))  
+    date: Mapped[dt.date | None] = mapped_column(Date, index=True)
     raw: Mapped[dict | None] = mapped_column(JSON)
 
     vendor = relationship("Vendor", back_populates="transactions")
 
+# /api/transactions filters by vendor and pages newest-first by id
+Index("ix_txn_vendor_id_desc", Transaction.vendor_id, Transaction.id.desc())
+# subscription detection groups and orders by lower(trim(merchant_name)), date within a date window
+Index("ix_txn_merchant_date", func.lower(func.trim(Transaction.merchant_name)), Transaction.date)
+
 class Invoice(Base):
     __tablename__ = "invoices"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -41,12 +49,12 @@ class Invoice(Base):
 class Subscription(Base):
     __tablename__ = "subscriptions"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    vendor_id: Mapped[int | None] = mapped_column(ForeignKey("vendors.id"))
+    vendor_id: Mapped[int | None] = mapped_column(ForeignKey("vendors.id"), unique=True)  # one per vendor
     status: Mapped[str] = mapped_column(String(32), default="inferred")  # inferred|active|cancelled
     interval: Mapped[str | None] = mapped_column(String(32))  # monthly/yearly/unknown
     confidence: Mapped[float] = mapped_column(Float, default=0.0)
-    first_seen: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    last_seen: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    first_seen: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
+    last_seen: Mapped[dt.datetime] = mapped_column(DateTime, default=dt.datetime.utcnow)
     next_expected: Mapped[str | None] = mapped_column(String(20))
 
     vendor = relationship("Vendor", back_populates="subscriptions")
@@ -1,9 +1,10 @@
 import sys
 from pathlib import Path
 
+import orjson
 import pytest
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 
 ROOT = Path(__file__).resolve().parents[2]
 BACKEND_DIR = ROOT / "backend"
@@ -11,21 +12,30 @@ for path in (ROOT, BACKEND_DIR):
     if str(path) not in sys.path:
         sys.path.insert(0, str(path))
 
-from backend import api_routes
-from backend import app as app_module
-from backend import database
-from backend.models import Base
+# patch the same top-level modules app.py imports (api_routes, database), not backend.* copies
+import api_routes
+import app as app_module
+import database
+from models import Base
 
 
 @pytest.fixture()
 def test_app(tmp_path, monkeypatch):
     db_path = tmp_path / "test.db"
-    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
-    session_local = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False},
+        json_serializer=lambda obj: orjson.dumps(obj, default=database._json_default).decode(),
+        json_deserializer=orjson.loads,
+    )
+    session_local = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+    db_session = scoped_session(session_local)
 
     monkeypatch.setattr(database, "engine", engine)
     monkeypatch.setattr(database, "SessionLocal", session_local)
-    monkeypatch.setattr(api_routes, "SessionLocal", session_local)
+    monkeypatch.setattr(database, "db_session", db_session)
+    monkeypatch.setattr(api_routes, "db_session", db_session)
+    monkeypatch.setattr(app_module, "db_session", db_session)
     monkeypatch.setattr(api_routes, "engine", engine)
     monkeypatch.setattr(app_module, "engine", engine)
     monkeypatch.setenv("MOCK_TEXTRACT", "1")
@@ -1,4 +1,7 @@
 import io
+from datetime import date, timedelta
+
+import api_routes
 
 
 def test_ping(client):
@@ -32,3 +35,128 @@ def test_textract_mock(client):
     body = resp.get_json()
     assert body["ok"] is True
     assert body["parsed"]["vendor"] == "Adobe Inc."
+
+
+def test_transactions_cursor_pagination(client):
+    client.post("/api/demo/reset")
+    client.post("/api/demo/seed")
+
+    first = client.get("/api/transactions?limit=5").get_json()
+    assert len(first["transactions"]) == 5
+    assert first["next_cursor"] == first["transactions"][-1]["id"]
+
+    second = client.get(f"/api/transactions?limit=5&after_id={first['next_cursor']}").get_json()
+    assert len(second["transactions"]) == 5
+    assert second["transactions"][0]["id"] < first["next_cursor"]
+
+    last = client.get(f"/api/transactions?limit=5&after_id={second['next_cursor']}").get_json()
+    assert len(last["transactions"]) == 2
+    assert last["next_cursor"] is None
+
+
+def test_textract_reuses_vendor(client):
+    client.post("/api/demo/reset")
+    for _ in range(2):
+        data = {"file": (io.BytesIO(b"fake"), "invoice.pdf")}
+        resp = client.post("/api/textract", data=data, content_type="multipart/form-data")
+        assert resp.status_code == 200
+
+    vendors = client.get("/api/vendors").get_json()["vendors"]
+    assert [v["name"] for v in vendors] == ["Adobe Inc."]
+
+
+def test_bulk_update_subscriptions(client):
+    client.post("/api/demo/reset")
+    client.post("/api/demo/seed")
+    subs = client.post("/api/detect").get_json()["subscriptions"]
+    ids = [sub["id"] for sub in subs[:2]]
+
+    resp = client.patch(
+        "/api/subscriptions",
+        json={"updates": [{"id": ids[0], "status": "cancelled"}, {"id": ids[1], "interval": "yearly"}]},
+    )
+    assert resp.status_code == 200
+    by_id = {sub["id"]: sub for sub in resp.get_json()["subscriptions"]}
+    assert by_id[ids[0]]["status"] == "cancelled"
+    assert by_id[ids[1]]["interval"] == "yearly"
+
+    resp = client.patch("/api/subscriptions", json={"updates": [{"id": 9999, "status": "active"}]})
+    assert resp.status_code == 404
+
+    resp = client.patch(f"/api/subscriptions/{ids[1]}", json={"status": "active"})
+    assert resp.status_code == 200
+    assert resp.get_json()["subscription"]["status"] == "active"
+
+
+class _FakeTransactionsResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def to_dict(self):
+        return self._payload
+
+
+class _FakePlaidClient:
+    def __init__(self, txns, page_size=2):
+        self.txns = txns
+        self.page_size = page_size
+        self.calls = 0
+
+    def transactions_get(self, req):
+        self.calls += 1
+        offset = getattr(req.options, "offset", 0)
+        page = self.txns[offset : offset + min(req.options.count, self.page_size)]
+        return _FakeTransactionsResponse({"transactions": page, "total_transactions": len(self.txns)})
+
+
+def test_plaid_transactions_skip_duplicates(test_app):
+    base = date.today()
+    txns = [
+        {
+            "transaction_id": f"txn-{i}",
+            "merchant_name": "Netflix",
+            "amount": 15.99,
+            "iso_currency_code": "USD",
+            "date": base - timedelta(days=30 * i),
+        }
+        for i in range(3)
+    ]
+    plaid_client = _FakePlaidClient(txns + [txns[0]])
+    test_app.extensions["plaid_client"] = plaid_client
+    test_app.config["PLAID_ACCESS_TOKEN"] = "access-sandbox-test"
+    client = test_app.test_client()
+    client.post("/api/demo/reset")
+
+    resp = client.get("/api/plaid/transactions")
+    assert resp.status_code == 200
+    assert resp.get_json()["saved"] == 3
+    assert plaid_client.calls == 2
+
+    resp = client.get("/api/plaid/transactions")
+    assert resp.get_json()["saved"] == 0
+
+
+def test_detect_reports_outdated_schema(test_app):
+    client = test_app.test_client()
+    client.post("/api/demo/seed")
+    # recreate subscriptions the way older demo.db files have it: no UNIQUE(vendor_id)
+    with api_routes.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE subscriptions")
+        conn.exec_driver_sql(
+            "CREATE TABLE subscriptions (id INTEGER PRIMARY KEY, vendor_id INTEGER, status VARCHAR(32), "
+            "interval VARCHAR(32), confidence FLOAT, first_seen DATETIME, last_seen DATETIME, "
+            "next_expected VARCHAR(20))"
+        )
+
+    resp = client.post("/api/detect")
+    assert resp.status_code == 500
+    assert resp.get_json()["error"]["code"] == "DB_SCHEMA_OUTDATED"
+
+
+def test_detect_assigns_vendor_ids_in_stable_order(client):
+    client.post("/api/demo/reset")
+    client.post("/api/demo/seed")
+    client.post("/api/detect")
+
+    vendors = client.get("/api/vendors").get_json()["vendors"]
+    assert sorted((v["id"], v["name"]) for v in vendors) == [(1, "Adobe Inc."), (2, "Netflix"), (3, "Spotify")]
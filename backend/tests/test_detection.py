@@ -21,7 +21,7 @@ def test_detect_basic_subscriptions_monthly():
                     merchant_name="Netflix",
                     amount=15.99,
                     iso_currency_code="USD",
-                    date=(base - timedelta(days=offset)).isoformat(),
+                    date=base - timedelta(days=offset),
                     raw={},
                 )
             )
@@ -31,7 +31,7 @@ def test_detect_basic_subscriptions_monthly():
                     merchant_name="Starbucks",
                     amount=5.50,
                     iso_currency_code="USD",
-                    date=(base - timedelta(days=offset)).isoformat(),
+                    date=base - timedelta(days=offset),
                     raw={},
                 )
             )
@@ -45,3 +45,94 @@ def test_detect_basic_subscriptions_monthly():
         assert vendor.name == "Netflix"
     finally:
         s.close()
+
+
+def _session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine, autoflush=False, autocommit=False)()
+
+
+def _add_charges(s, merchant, offsets, amount=9.99, raw=None):
+    base = date.today()
+    for offset in offsets:
+        s.add(
+            Transaction(
+                merchant_name=merchant,
+                amount=amount,
+                iso_currency_code="USD",
+                date=base - timedelta(days=offset),
+                raw=raw if raw is not None else {},
+            )
+        )
+    s.commit()
+
+
+def _detected_vendor_names(s):
+    return sorted(s.get(Vendor, sub.vendor_id).name for sub in s.query(Subscription).all())
+
+
+def test_detect_skips_excluded_pfc_categories():
+    s = _session()
+    try:
+        _add_charges(s, "Spotify", (0, 30, 60))
+        _add_charges(s, "Landlord LLC", (1, 31, 61), 1200.0, {"personal_finance_category": {"primary": "TRANSFER_OUT"}})
+        # the category comparison is case-insensitive
+        _add_charges(s, "Acme Savings", (2, 32, 62), 100.0, {"personal_finance_category": {"primary": "savings"}})
+
+        detect_basic_subscriptions(s)
+
+        assert _detected_vendor_names(s) == ["Spotify"]
+    finally:
+        s.close()
+
+
+def test_detect_requires_monthly_cadence():
+    s = _session()
+    try:
+        _add_charges(s, "Spotify", (0, 30, 60))
+        _add_charges(s, "Weekly Box", (0, 7, 14, 21))  # ~7-day gaps
+        _add_charges(s, "Quarterly Co", (0, 45, 90))  # ~45-day gaps
+
+        detect_basic_subscriptions(s)
+
+        assert _detected_vendor_names(s) == ["Spotify"]
+    finally:
+        s.close()
+
+
+def test_detect_skips_blacklisted_names():
+    s = _session()
+    try:
+        _add_charges(s, "Spotify", (0, 30, 60))
+        _add_charges(s, "  GUSTO PAYROLL ", (0, 30, 60), 2500.0)
+        _add_charges(s, "Shell Gas Station", (3, 33, 63), 40.0)
+
+        detect_basic_subscriptions(s)
+
+        assert _detected_vendor_names(s) == ["Spotify"]
+    finally:
+        s.close()
+
+
+def test_detect_rerun_keeps_user_status_and_updates_next_expected():
+    s = _session()
+    try:
+        _add_charges(s, "Spotify", (30, 60, 90))
+        detect_basic_subscriptions(s)
+        sub = s.query(Subscription).one()
+        assert sub.next_expected == date.today().isoformat()
+
+        # the user cancels it (PATCH /api/subscriptions/<id>)
+        sub.status = "cancelled"
+        s.commit()
+
+        _add_charges(s, "Spotify", (0,))
+        detect_basic_subscriptions(s)
+        s.expire_all()
+
+        sub = s.query(Subscription).one()
+        assert sub.status == "cancelled"
+        assert sub.next_expected == (date.today() + timedelta(days=30)).isoformat()
+    finally:
+        s.close()
@@ -0,0 +1,61 @@
+import pytest
+from plaid import ApiException
+
+import api_routes
+
+
+def _api_error(status, retry_after=None):
+    exc = ApiException(status=status, reason="error")
+    exc.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return exc
+
+
+class _FlakyCall:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, req):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"ok": True, "req": req}
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(api_routes.time, "sleep", delays.append)
+    monkeypatch.setattr(api_routes, "_plaid_calls", api_routes.deque())
+    return delays
+
+
+def test_plaid_call_retries_429_with_retry_after(sleeps):
+    fn = _FlakyCall([_api_error(429, retry_after="2"), _api_error(429)])
+    assert api_routes._plaid_call(fn, "req") == {"ok": True, "req": "req"}
+    assert fn.calls == 3
+    # Retry-After wins; without it the second retry backs off exponentially
+    assert sleeps == [2.0, api_routes.PLAID_BACKOFF_BASE * 2]
+
+
+def test_plaid_call_caps_retry_after(sleeps):
+    fn = _FlakyCall([_api_error(429, retry_after="120")])
+    api_routes._plaid_call(fn, "req")
+    assert sleeps == [api_routes.PLAID_MAX_BACKOFF]
+
+
+def test_plaid_call_reraises_non_429(sleeps):
+    fn = _FlakyCall([_api_error(400)])
+    with pytest.raises(ApiException):
+        api_routes._plaid_call(fn, "req")
+    assert fn.calls == 1
+    assert sleeps == []
+
+
+def test_plaid_call_reraises_when_retries_run_out(sleeps):
+    fn = _FlakyCall([_api_error(429)] * (api_routes.PLAID_MAX_RETRIES + 1))
+    with pytest.raises(ApiException) as exc_info:
+        api_routes._plaid_call(fn, "req")
+    assert exc_info.value.status == 429
+    assert fn.calls == api_routes.PLAID_MAX_RETRIES + 1
+    assert len(sleeps) == api_routes.PLAID_MAX_RETRIES